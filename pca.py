@@ -23,6 +23,9 @@ compatible with these devices.
 The data needs to be convered to matrix format, i.e. X is a matrix.
 """
 import numpy as np
+from scipy.linalg import eigh, svd
+from scipy.linalg.blas import ssyrk
+from scipy.sparse.linalg import svds
 from scipy.spatial.distance import pdist, squareform
 
 
@@ -31,9 +34,23 @@ class PCA_demo: # Assuming a (maximum) 20 qubit quantum computer, we have set nu
     # mapped to one qubit. This may not be the case.
     
     # For images, need to use the grayscale (see preproc_utils) and flatten functions beforehand (see notebook)
-    def __init__(self, num_components =20):
+    def __init__(self, num_components =20, solver = "auto", backend = "numpy"):
         #number of pca components
+        if num_components < 1:
+            raise ValueError("num_components must be at least 1.")
         self.num_components = num_components
+        # "svd" (truncated svd of the data), "covariance_eigh" (eigh of the covariance matrix)
+        # or "auto", which picks svd for wide data and covariance_eigh for tall data
+        if solver not in ("auto", "svd", "covariance_eigh"):
+            raise ValueError("solver must be one of 'auto', 'svd' or 'covariance_eigh'.")
+        self.solver = solver
+        # "numpy", "jax" or "cupy": where the covariance and its eigendecomposition are
+        # computed. Only the covariance_eigh solver runs on the GPU, so "auto" picks it
+        # whenever a GPU backend is used. The GPU backends are only used for more than
+        # 1024 features, below that the transfer costs more than it saves
+        if backend not in ("numpy", "jax", "cupy"):
+            raise ValueError("backend must be one of 'numpy', 'jax' or 'cupy'.")
+        self.backend = backend
         # vector with component weights 
         self.components = None
         self.mean = None
@@ -41,34 +58,104 @@ class PCA_demo: # Assuming a (maximum) 20 qubit quantum computer, we have set nu
         self.std = None 
         #handling standard deviation = 0 
         self.std_filled = None 
-        #how much variance is captured by the num_components
+        #how much variance is captured by each of the num_components
         self.variance_ratio = None 
+        #how much variance is captured by the first 1, 2, ..., num_components
+        self.cumulative_variance_ratio = None
 
 
     def fit(self, X): #X needs to be a matrix, i.e for images use imread etc
         """
         Find principal components and sort them in descending order
         """
+        # image data is at most 8 bit anyway, so single precision is plenty and
+        # halves the memory traffic of all the BLAS/LAPACK calls below
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        # the covariance is normalized by n-1, so a single sample has none
+        if X.shape[0] < 2:
+            raise ValueError("At least 2 samples are needed to fit the PCA.")
         # data standardization; (X - mean)/std
-        self.mean = np.mean(X, axis = 0)
-        self.std = np.std(X, axis = 0)
+        # mean and std both come from the sums of X and X**2, so no centered copy
+        # of X is needed. The sums are accumulated in double precision, as
+        # sum(X**2)/n - mean**2 cancels badly otherwise, and what is left of that
+        # cancellation is cut to 0 so that constant features stay exactly constant
+        n = X.shape[0]
+        s = X.sum(axis = 0, dtype=np.float64)
+        s2 = np.einsum("ij,ij->j", X, X, dtype=np.float64)
+        mean = s / n
+        var = s2 / n - mean**2
+        var[var <= 8 * np.finfo(np.float64).eps * s2 / n] = 0.0
+        self.mean = mean.astype(np.float32)
+        self.std = np.sqrt(var).astype(np.float32)
          #handleing zero standard deviation
         self.std_filled = self.std.copy()
         self.std_filled[self.std == 0] = 1.0
-        X = (X- self.mean)/self.std_filled
-        # calculate eigenvalues & eigenvectors of the covariance matrix
-        linear = np.cov(X.T)
-        # for some reason, eig gives me complex numbers (complex = 0)
-        eigenvalues, eigenvectors = np.linalg.eigh(linear)  
-            
-        # sort eigenvalues & eigenvectors in descending order
-        sort_idx = np.argsort(eigenvalues)[::-1]
-        eigenvalues   = eigenvalues[sort_idx]
-        eigenvectors  = eigenvectors[:, sort_idx]
-        
-        # store principal components & variance captured by components
-        self.components = eigenvectors[:,:self.num_components]
-        self.variance_ratio = np.sum(eigenvalues[:self.num_components]) / np.sum(eigenvalues) 
+        X = self._standardize(X)
+        n, d = X.shape
+
+        # constant features are zero columns after the standardization, they add
+        # nothing but size to the decomposition, so they are left out of it
+        keep = self.std > 0
+        if not keep.all():
+            X = X[:, keep]
+        d_keep = X.shape[1]
+        if d_keep == 0:
+            raise ValueError("All features of X are constant, there are no principal components.")
+        k = min(self.num_components, n, d_keep)
+
+        use_device = self.backend != "numpy" and d_keep > 1024
+        solver = self.solver
+        if solver == "auto":
+            solver = "covariance_eigh" if n > d_keep or use_device else "svd"
+
+        if solver == "svd":
+            # only the top k singular vectors of the standardized data are needed,
+            # svds cannot return all of them though, so fall back to a thin svd then
+            if k < min(n, d_keep):
+                # fixed seed, so that ARPACK starts from the same vector every fit
+                _, S, Vt = svds(X, k=k, random_state=0)
+                # svds returns the singular values in ascending order
+                S = S[::-1]
+                Vt = Vt[::-1]
+            else:
+                _, S, Vt = svd(X, full_matrices=False)
+                S = S[:k]
+                Vt = Vt[:k]
+            # the eigenvalues of the covariance matrix are S**2/(n-1) and their sum is
+            # its trace, so the discarded ones never have to be computed
+            components = Vt.T
+            self.variance_ratio = S**2 / np.einsum("ij,ij->", X, X)
+        elif solver == "covariance_eigh" and use_device:
+            eigenvalues, eigenvectors, trace = _device_cov_eigh(X, k, self.backend)
+            components = eigenvectors
+            self.variance_ratio = eigenvalues / trace
+        else:
+            # covariance_eigh on the CPU (solver was checked in __init__)
+            # calculate eigenvalues & eigenvectors of the covariance matrix
+            # X is already centered, so the covariance is a single symmetric rank-k
+            # update X.T @ X/(n-1), which only writes the upper triangle
+            # (X.T is fortran ordered, so passing it with trans=0 avoids a copy)
+            linear = ssyrk(alpha=1.0 / (n - 1), a=X.T, trans=0, lower=0)
+            linear = linear + np.triu(linear, 1).T
+            # only the top k eigenpairs are computed, eigh returns them in ascending
+            # order so they are reversed to have them descending
+            eigenvalues, eigenvectors = eigh(
+                linear, subset_by_index=[d_keep - k, d_keep - 1]
+            )
+            eigenvalues = eigenvalues[::-1]
+            eigenvectors = eigenvectors[:, ::-1]
+
+            # store principal components & variance captured by components
+            # the trace of the covariance is the sum of all its eigenvalues
+            components = eigenvectors
+            self.variance_ratio = eigenvalues / np.trace(linear)
+        # the sign of every component is arbitrary, so it is fixed by making the
+        # entry with the largest absolute value positive (like sklearn's svd_flip)
+        max_rows = np.argmax(np.abs(components), axis=0)
+        components = components * np.sign(components[max_rows, range(k)])
+        # the constant features get zero weight in every component
+        self.components = np.zeros((d, k), dtype=np.float32)
+        self.components[keep] = components
         # This will allow you to see the cumulative variance ratio, i.e. the amount of variance each pca component adds to the total variance
         self.cumulative_variance_ratio = np.cumsum(self.variance_ratio) # added 22/05
 
@@ -79,10 +166,66 @@ class PCA_demo: # Assuming a (maximum) 20 qubit quantum computer, we have set nu
         Transform data with linear or radial PCA
         """
         # data standardization 
-        X = (X- self.mean)/self.std_filled
-        return np.dot(X, self.components.T)
-            
-        
-    
+        X = self._standardize(X)
+        # components has shape (d, num_components), so no transpose is needed here.
+        # Both operands are C-contiguous float32, so this is a single sgemm call
+        # (ascontiguousarray does not copy components as stored by fit)
+        return np.dot(X, np.ascontiguousarray(self.components, dtype=np.float32))
 
-    
+
+    def _standardize(self, X):
+        """
+        Computes (X - mean)/std into a single new buffer instead of allocating
+        one temporary for the difference and another one for the quotient
+        """
+        buf = np.empty(np.shape(X), dtype=np.float32)
+        np.subtract(X, self.mean, out=buf)
+        np.divide(buf, self.std_filled, out=buf)
+        return buf
+
+
+def _device_cov_eigh(X, k, backend):
+    """
+    Covariance of the standardized X and its top k eigenpairs (descending) computed
+    on a GPU with jax or cupy. Returns numpy arrays and the trace of the covariance.
+    """
+    if backend == "jax":
+        import jax.numpy as jnp
+
+        w, V, trace = _jax_cov_eigh()(jnp.asarray(X), k)
+        return np.asarray(w), np.asarray(V), float(trace)
+    elif backend == "cupy":
+        import cupy as cp
+
+        n = X.shape[0]
+        Xc = cp.asarray(X)
+        C = (Xc.T @ Xc) / (n - 1)
+        w, V = cp.linalg.eigh(C)
+        return cp.asnumpy(w[-k:][::-1]), cp.asnumpy(V[:, -k:][:, ::-1]), float(cp.trace(C))
+    else:
+        raise ValueError("backend must be one of 'numpy', 'jax' or 'cupy'.")
+
+
+def _cov_eigh(Xj, k):
+    """
+    jax version of the covariance eigendecomposition, see _jax_cov_eigh
+    """
+    import jax.numpy as jnp
+
+    C = (Xj.T @ Xj) / (Xj.shape[0] - 1)
+    w, V = jnp.linalg.eigh(C)
+    return w[-k:][::-1], V[:, -k:][:, ::-1], jnp.trace(C)
+
+
+# jax is only imported once the jax backend is actually used, so the jitted
+# _cov_eigh is created on the first call and then reused by every later fit
+_jax_cov_eigh_jit = None
+
+
+def _jax_cov_eigh():
+    global _jax_cov_eigh_jit
+    if _jax_cov_eigh_jit is None:
+        import jax
+
+        _jax_cov_eigh_jit = jax.jit(_cov_eigh, static_argnums=1)
+    return _jax_cov_eigh_jit
@@ -1,6 +1,7 @@
 """This module collects methods that scan a landscape along affine linear subspaces,
 so that they can easily be plotted."""
 
+from concurrent.futures import ProcessPoolExecutor
 from typing import Callable, List, Optional, Union
 
 import numpy as np
@@ -8,6 +9,15 @@ from matplotlib import pyplot as plt
 
 from .dr_tools import AffineSubspace, numeric_hessian
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional (hyvis[jit]), without it the helpers run as plain python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
 
 class LinearScan:
     """This object contains the results of a linear scan.
@@ -167,6 +177,8 @@ def landscape_scan_linear(
     scope: Union[np.ndarray, float] = 5,
     resolution: Optional[Union[int, np.ndarray]] = 10,
     pools: Optional[int] = 1,
+    vectorized: bool = False,
+    block_size: int = 1024,
 ) -> LinearScan:
     """This function scans a portion of an affine linear subspace of the higher
     dimensional lanscape created by func, with a specified resolution.
@@ -185,9 +197,20 @@ def landscape_scan_linear(
         resolution: How many samples to take in each direction of subspace.
         If provided as int, the resolution will be the same for each direction.
 
-        pools: the number of pools to be used in the parallelization of the
-        evaluation of func on the parameter grid. This is currently deactivated
-        as it might not work as intended.
+        pools: the number of processes to be used in the parallelization of the
+        evaluation of func on the parameter grid. Not used if func is vectorized.
+        If larger than 1, a new process pool is started on every call, which
+        only pays off if func is expensive compared to that start-up, and func
+        has to be picklable. Where processes are spawned (the default on macOS
+        and Windows) that excludes functions defined in __main__ or a notebook.
+
+        vectorized: Whether func accepts a whole batch of arguments of shape
+        (B, dim) and returns the B values as an array of shape (B,).
+        If so, the grid is passed to func in blocks of block_size points.
+
+        block_size: How many grid points are computed at once. A vectorized func
+        receives them in a single call. Keeping the blocks small lets them stay in
+        cache while func works on them, and the whole grid is never held in memory.
 
     Output:
 
@@ -195,7 +218,8 @@ def landscape_scan_linear(
 
     Notes:
 
-        The total number of func calls is prod(resolution).
+        The total number of func calls is prod(resolution), unless func is
+        vectorized, in which case it is ceil(prod(resolution)/block_size).
 
         The outermost values sampled are defined by scope.
         In particular the exact center of the subspace will only be sampled if all
@@ -206,7 +230,6 @@ def landscape_scan_linear(
     # initalizing some important variables:
 
     d_num = subspace.directions.shape[0]
-    d_dim = subspace.directions.shape[1]
 
     if not isinstance(scope, np.ndarray):
         scope = scope * np.append(-np.ones([d_num, 1]), np.ones([d_num, 1]), 1)
@@ -220,55 +243,89 @@ def landscape_scan_linear(
     if np.isscalar(resolution):
         resolution = resolution * np.ones(d_num, dtype=int)
 
-    # creating the grid of arguments to be scanned:
-    # by first initializing every point as bottom_corner and then adding scaled grids
-    # of all the direction vectors
-    bottom_corner = (
-        subspace.center.flatten()
-        + np.sum(
-            np.dot(np.diag(scope[:, 0]), subspace.directions), 0
-        ).flatten()
-    )
-    grid = np.tile(bottom_corner, np.append(resolution, [1]))
-    for id_d in range(d_num):
-        steps_d = np.linspace(
-            0, scope[id_d, 1] - scope[id_d, 0], resolution[id_d]
-        )
-        tile_d = np.multiply.outer(steps_d, subspace.directions[id_d, :])
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1.")
 
-        morph_d = np.ones(grid.ndim, dtype=np.int64)
-        morph_d[-1] = d_dim
-        morph_d[id_d] = resolution[id_d]
-        tile_d = tile_d.reshape(morph_d)
+    # the grid of arguments is never built as a whole, as it has
+    # prod(resolution) * dim entries. Instead every point
+    # center + sum_k steps_k[i_k] * directions[k] is computed when it is needed,
+    # a block of points at a time (see _grid_block)
+    steps = [
+        np.linspace(scope[id_d, 0], scope[id_d, 1], resolution[id_d])
+        for id_d in range(d_num)
+    ]
+    grid_args = (steps, resolution, subspace.center, subspace.directions)
 
-        res_d = np.append(resolution, [1])
-        res_d[id_d] = 1
+    # applying the function to all the values in the grid to get the scan:
+    # this should be the most expensive step
 
-        grid_d = np.tile(tile_d, res_d)
+    res_total = int(np.prod(resolution))
 
-        grid = grid + grid_d
+    if vectorized:
+        result = np.zeros(res_total)
+        for start in range(0, res_total, block_size):
+            result[start : start + block_size] = func(
+                _grid_block(start, start + block_size, *grid_args)
+            )
+        result = result.reshape(resolution)
+    elif pools is None or pools <= 1:
+        result = np.zeros(res_total)
+        for start in range(0, res_total, block_size):
+            block = _grid_block(start, start + block_size, *grid_args)
+            for id_b in range(block.shape[0]):
+                result[start + id_b] = func(block[[id_b], :])
+        result = result.reshape(resolution)
+    else:
+        # func and the grid definition are handed to every worker once by the
+        # initializer, so only the start index is pickled for each task
+        chunk = max(1, res_total // (pools * 8))
+        with ProcessPoolExecutor(
+            max_workers=pools,
+            initializer=_init_pool,
+            initargs=(func, chunk, grid_args),
+        ) as ex:
+            result = ex.map(_call_pool_func, range(0, res_total, chunk))
+            result = np.concatenate(list(result)).reshape(resolution)
 
-    # applying the function to all the values in the grid to get the scan:
-    # this should be the most expensive step
+    return LinearScan(result=result, subspace=subspace, scope=scope)
 
-    # used some tricks with reshape to write a paralellization friendly loop that
-    # iterates over all the argument vectors in the grid
 
-    res_total = np.prod(resolution)
-    result = np.zeros(res_total)
-    grid_r = grid.reshape(res_total, d_dim)
+def _grid_block(
+    start: int,
+    stop: int,
+    steps: List[np.ndarray],
+    resolution: np.ndarray,
+    center: np.ndarray,
+    directions: np.ndarray,
+) -> np.ndarray:
+    """Computes the points start to stop (exclusive) of the flattened scan grid of
+    landscape_scan_linear. Output shape is (stop - start, dim)."""
+    stop = min(stop, int(np.prod(resolution)))
+    idx = np.unravel_index(np.arange(start, stop), resolution)
+    coeff = np.stack([steps[id_d][idx[id_d]] for id_d in range(len(steps))], 1)
+    return center + np.dot(coeff, directions)
 
-    # # parallelized (experimental)
-    # with mp.Pool(pools) as p:
-    #     result = p.map(func, grid_r)
-    # result = np.array(result).reshape(resolution)
 
-    # unparallelized
-    for id_r in range(res_total):
-        result[id_r] = func(grid_r[[id_r], :])
-    result = np.array(result).reshape(resolution)
+_pool_state = None
 
-    return LinearScan(result=result, subspace=subspace, scope=scope)
+
+def _init_pool(
+    func: Callable[[np.ndarray], float], chunk: int, grid_args: tuple
+) -> None:
+    """Stores func and the grid definition in a worker process of
+    landscape_scan_linear."""
+    global _pool_state
+    _pool_state = (func, chunk, grid_args)
+
+
+def _call_pool_func(start: int) -> np.ndarray:
+    """Evaluates the func stored by _init_pool on the chunk of the grid that begins
+    at start."""
+    func, chunk, grid_args = _pool_state
+    block = _grid_block(start, start + chunk, *grid_args)
+    return np.array(
+        [func(block[[id_b], :]) for id_b in range(block.shape[0])], dtype=float
+    ).reshape(-1)
 
 
 def collective_scan_linear(
@@ -277,6 +334,8 @@ def collective_scan_linear(
     scope: Union[np.ndarray, float] = 5,
     resolution: Optional[Union[int, np.ndarray]] = 10,
     pools: Optional[int] = 1,
+    vectorized: bool = False,
+    block_size: int = 1024,
 ) -> ScanCollection:
     """This functions creates a 1D scan
     in every direction of the provided subspace.
@@ -294,6 +353,12 @@ def collective_scan_linear(
             resolution: How many samples to take in each direction of subspace.
             The total number of func calls is prod(resolution).
 
+        vectorized: Whether func accepts a batch of arguments of shape (B, dim)
+            and returns an array of shape (B,). See landscape_scan_linear.
+
+        block_size: How many grid points are computed at once.
+            See landscape_scan_linear.
+
     Output:
         ScanCollection object that contains 1D scans for each direction of the subspace.
 
@@ -325,6 +390,8 @@ def collective_scan_linear(
                 scope=scope[[i_scan], :],
                 resolution=resolution[i_scan],
                 pools=pools,
+                vectorized=vectorized,
+                block_size=block_size,
             )
         )
 
@@ -338,6 +405,8 @@ def hessian_scan(
     resolution: Optional[Union[int, np.ndarray]] = 10,
     epsilon: Optional[float] = 0.01,
     pools: Optional[int] = 1,
+    vectorized: bool = False,
+    block_size: int = 1024,
 ):
     """This function calculates the Hessian of func at the center of subspace
     and performs a collective scan in the directions of the eigenvectors.
@@ -356,6 +425,13 @@ def hessian_scan(
         resolution: How many samples to take in each direction of subspace.
         If provided as int, the resolution will be the same for each direction.
 
+        vectorized: Whether func accepts a batch of arguments of shape (B, dim)
+        and returns an array of shape (B,). Only used for the scans, the Hessian
+        itself is always calculated with single evaluations.
+
+        block_size: How many grid points of the scans are computed at once.
+        See landscape_scan_linear.
+
     Output:
 
         The Hessian and a ScanCollection object.
@@ -375,6 +451,8 @@ def hessian_scan(
         scope=scope,
         resolution=resolution,
         pools=pools,
+        vectorized=vectorized,
+        block_size=block_size,
     )
 
     return scan_H, H
@@ -394,56 +472,76 @@ def pathscan(
     if mode == "raw":
         scanpath = path
     if mode == "refined":
-        scanpath = np.zeros([(l_p - 1) * (1 + resolution) + 1, dim])
-        for step_id in range(l_p - 1):
-            for i_res in range(resolution + 1):
-                scanpath[step_id * (resolution + 1) + i_res, :] = path[
-                    step_id, :
-                ] + (path[step_id + 1, :] - path[step_id, :]) * (i_res) / (
-                    resolution + 1
-                )
+        # all the intermediate nodes of all the steps at once, by broadcasting the
+        # step vectors against the fractions of a step
+        t = np.arange(resolution + 1) / (resolution + 1)
+        seg = path[:-1, None, :] + (path[1:, None, :] - path[:-1, None, :]) * t[
+            None, :, None
+        ]
+        scanpath = np.empty(
+            [(l_p - 1) * (1 + resolution) + 1, dim],
+            dtype=np.result_type(path, t),
+        )
+        scanpath[:-1] = seg.reshape(-1, dim)
         scanpath[-1] = path[-1]
+    if mode in ("compressed", "segmented"):
+        # the lengths of all the steps of the path in one go,
+        # einsum skips the overflow safe scaling that np.linalg.norm does
+        diff = np.diff(path, axis=0)
+        seg_len = np.sqrt(np.einsum("ij,ij->i", diff, diff))
     if mode == "compressed":
-        scanpath = np.zeros(shape=path.shape)
-        scanpath[0, :] = path[0, :]
-        cp = 1
-        csp = 1
-        acc_path = 0
-        while cp < l_p:
-            acc_path += np.linalg.norm(path[cp - 1, :] - path[cp, :])
-            if acc_path >= stepsize:
-                scanpath[csp, :] = path[cp, :]
-                cp += 1
-                csp += 1
-                acc_path = 0
-            else:
-                cp += 1
-        scanpath = scanpath[:csp, :]
+        scanpath = path[_compressed(seg_len, stepsize)]
     if mode == "segmented":
-        total_path = 0
-        for step_id in range(l_p - 1):
-            total_path += np.linalg.norm(
-                path[step_id, :] - path[step_id + 1, :]
-            )
+        total_path = seg_len.sum()
         stepsize = total_path / (resolution - 1)
 
-        scanpath = np.zeros(shape=path.shape)
-        scanpath[0, :] = path[0, :]
-        cp = 1
-        csp = 1
-        acc_path = 0
-        while cp < l_p:
-            if (
-                acc_path + np.linalg.norm(path[cp - 1, :] - path[cp, :])
-                >= stepsize
-            ):
-                reststep = stepsize - acc_path
-                scanpath[csp, :] = path[cp, :]
-                cp += 1
-                csp += 1
-                acc_path = reststep
-            else:
-                cp += 1
-        scanpath = scanpath[:csp, :]
+        scanpath = path[_segmented(seg_len, stepsize)]
 
     pass
+
+
+@njit(cache=True)
+def _compressed(seg_len: np.ndarray, stepsize: float) -> np.ndarray:
+    """Returns the indices of the nodes of a path that are at least stepsize
+    away from the last kept node, measured along the path.
+    seg_len[i] is the length of the step from node i to node i+1."""
+    l_p = seg_len.shape[0] + 1
+
+    # only indices are collected, so the selected nodes are copied exactly once
+    keep = np.zeros(l_p, dtype=np.int64)
+    cp = 1
+    csp = 1
+    acc_path = 0.0
+    while cp < l_p:
+        acc_path += seg_len[cp - 1]
+        if acc_path >= stepsize:
+            keep[csp] = cp
+            cp += 1
+            csp += 1
+            acc_path = 0.0
+        else:
+            cp += 1
+    return keep[:csp]
+
+
+@njit(cache=True)
+def _segmented(seg_len: np.ndarray, stepsize: float) -> np.ndarray:
+    """Returns the indices of nodes of a path that are roughly stepsize apart,
+    measured along the path.
+    seg_len[i] is the length of the step from node i to node i+1."""
+    l_p = seg_len.shape[0] + 1
+
+    keep = np.zeros(l_p, dtype=np.int64)
+    cp = 1
+    csp = 1
+    acc_path = 0.0
+    while cp < l_p:
+        if acc_path + seg_len[cp - 1] >= stepsize:
+            reststep = stepsize - acc_path
+            keep[csp] = cp
+            cp += 1
+            csp += 1
+            acc_path = reststep
+        else:
+            cp += 1
+    return keep[:csp]
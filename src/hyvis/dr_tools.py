@@ -1,5 +1,6 @@
 """This module contains tools for dimensionaly reduction and geomerty."""
 
+import math
 import numpy as np
 from typing import Optional, Callable, List
 import copy
@@ -45,13 +46,17 @@ class AffineSubspace:
                 == np.identity(d_num, dtype=float)
             ).all()
         ):
-            self.directions = directions
+            self.directions = np.ascontiguousarray(directions)
         else:
             # warnings.warn(
             #     """Directions were not given as orthonormal basis so they will be
             #     adjusted automatically."""
             # )
-            self.directions = gramschmidt(directions.transpose()).transpose()
+            # gramschmidt works on columns, so its transposed output would otherwise
+            # be fortran ordered and every direction a strided view
+            self.directions = np.ascontiguousarray(
+                gramschmidt(directions.transpose()).transpose()
+            )
             if not (
                 np.round(
                     np.dot(self.directions, np.transpose(self.directions)), sharpness
@@ -173,13 +178,18 @@ class Hessian:
         """Calculates and adds the eigenvalues and eigenvectors
         as attributes to the object. Sorts eigenvalues lowest to highest."""
         if not hasattr(self, "eigenvalues"):
-            ev = np.linalg.eigh(self.matrix)
+            # for the common 1 or 2 direction scans the closed form is much
+            # faster than the setup of the LAPACK call
+            if self.matrix.shape[0] <= 2 and np.isrealobj(self.matrix):
+                self.eigenvalues, self.eigenvectors = eigh_small(self.matrix)
+            else:
+                ev = np.linalg.eigh(self.matrix)
 
-            # sorting the eigenvalues in ascending order
-            order = np.argsort(ev.eigenvalues)
+                # sorting the eigenvalues in ascending order
+                order = np.argsort(ev.eigenvalues)
 
-            self.eigenvalues = ev.eigenvalues[order]
-            self.eigenvectors = ev.eigenvectors[:, order]
+                self.eigenvalues = ev.eigenvalues[order]
+                self.eigenvectors = ev.eigenvectors[:, order]
 
     def show_evs(self, **plot_kwargs):
         """Creates a scatterplot of the eigenvalues. y-axis is the actual eigenvalue,
@@ -196,6 +206,34 @@ class Hessian:
         plt.ylabel("eigenvalue")
 
 
+def eigh_small(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Closed form eigendecomposition of a real symmetric 1x1 or 2x2 matrix.
+    Like np.linalg.eigh only the lower triangle is used, and the eigenvalues are
+    returned in ascending order together with the eigenvectors as columns.
+    """
+    if matrix.shape[0] == 1:
+        return matrix[0].astype(float), np.ones((1, 1))
+
+    if matrix.shape[0] != 2:
+        raise ValueError("eigh_small only handles 1x1 and 2x2 matrices.")
+
+    a, b, c = float(matrix[0, 0]), float(matrix[1, 0]), float(matrix[1, 1])
+    mean = 0.5 * (a + c)
+    radius = math.hypot(0.5 * (a - c), b)
+    # mean - radius cancels if the eigenvalues differ a lot in size, so only the
+    # one with the larger magnitude is taken from it and the other one from the
+    # determinant, which is their product
+    big = mean + math.copysign(radius, mean)
+    small = (a * c - b * b) / big if big != 0 else 0.0
+    # the rotation that diagonalizes the matrix, (cos, sin) belongs to the larger
+    # eigenvalue
+    theta = 0.5 * math.atan2(2 * b, a - c)
+    cos, sin = math.cos(theta), math.sin(theta)
+    return np.array([min(big, small), max(big, small)]), np.array(
+        [[-sin, cos], [cos, sin]]
+    )
+
+
 def subspace_projection(
     pointcloud: np.ndarray,
     target_space: AffineSubspace,
@@ -249,6 +249,9 @@ def volume_scan(
 
     The subspace should have at least 3 dimensions. It can have more, but then
     it can not be animated.
+
+    pools is passed on to landscape_scan_linear for every frame, see there. Values
+    above 1 start a new process pool per frame and need a picklable func.
     """
 
     d_num = subspace.directions.shape[0]
@@ -311,7 +314,11 @@ def operator_scan(
     pools: Optional[int] = 1,
 ) -> VideoScan:
     """performs some number of scans, where in each step the
-    subspace is transformed by an affine linear operator"""
+    subspace is transformed by an affine linear operator
+
+    pools is passed on to landscape_scan_linear for every step, see there. Values
+    above 1 start a new process pool per step and need a picklable func.
+    """
 
     d_dim = subspace.directions.shape[1]
     d_num = subspace.directions.shape[0]
@@ -385,6 +392,11 @@ def trajectory_scan_stepwise_pca(
         resolution: How many samples to take in each direction of subspace.
         If provided as int, the resolution will be the same for each direction.
 
+        pools: Passed on to landscape_scan_linear for every frame. Values above 1
+        start a new process pool per frame, which only pays off if func is
+        expensive, and func must be picklable (not defined in __main__ or a
+        notebook when processes are spawned, as on macOS and Windows).
+
     Output:
 
         A trajectory scan object.
@@ -519,6 +531,11 @@ def trajectory_scan_stepwise_hessian(
         resolution: How many samples to take in each direction of subspace.
         If provided as int, the resolution will be the same for each direction.
 
+        pools: Passed on to landscape_scan_linear for every frame. Values above 1
+        start a new process pool per frame, which only pays off if func is
+        expensive, and func must be picklable (not defined in __main__ or a
+        notebook when processes are spawned, as on macOS and Windows).
+
     Output:
 
         A trajectory scan object.